@@ -1,9 +1,15 @@
 import numpy as np
 from sklearn.metrics.pairwise import cosine_similarity
 from sklearn.cluster import AgglomerativeClustering
-from vector import load_from_json
+from vector import load_student_vectors
 from sklearn.manifold import MDS
+from scipy.cluster.hierarchy import linkage, fcluster
+from scipy.spatial.distance import squareform
+import argparse
+import hashlib
 import logging
+import os
+import sys
 from typing import List, Dict, Any, Tuple, Optional
 from config import *
 
@@ -51,49 +57,199 @@ def print_similarity_matrix(students: List[Dict[str, Any]], matrix: np.ndarray)
     """
     Print the similarity matrix in a formatted manner.
     
+    The table is built in memory and written with a single call; use the
+    export module for cohorts too large to read on screen.
+    
     Args:
         students: List of student data dictionaries
         matrix: Similarity matrix
     """
     try:
-        print("\nSimilarity Matrix:")
-        print("-" * 80)
-        print("Student Names:", end="\t")
-        for student in students:
-            print(f"{student['name']:>10}", end="\t")
-        print("\n" + "-" * 80)
-        
-        for i, student in enumerate(students):
-            print(f"{student['name']:<10}", end="\t")
-            for j in range(len(students)):
-                print(f"{matrix[i][j]:10.3f}", end="\t")
-            print()
-        print("-" * 80)
-    except Exception as e:
-        logger.error(f"Error printing similarity matrix: {e}")
-def print_similarity_matrix(json, matrix):
-    print("\nSimilarity Matrix:")
+        names = [student["name"][:10] for student in students]
+        row_format = " ".join(["%10.2f"] * len(names))
 
-    # header, print student's name and dividing line
-    header = (" " * 10) + " ".join([f"{student['name'][:10]:>10}" for student in json])
-    print(header)
-    print("-" * (10 + (11 * len(json))))  # add '-' for readability
+        # header, print student's name and dividing line
+        lines = ["", "Similarity Matrix:"]
+        lines.append((" " * 10) + " ".join(f"{name:>10}" for name in names))
+        lines.append("-" * (10 + (11 * len(names))))  # add '-' for readability
 
-    # similarity matrix
-    for i, student in enumerate(json):
-        row = " ".join([f"{matrix[i, j]:>10.2f}" for j in range(len(json))])
-        print(f"{student['name'][:10]:<10} {row}")
+        # similarity matrix
+        for name, row in zip(names, np.asarray(matrix).tolist()):
+            lines.append(f"{name:<10} " + row_format % tuple(row))
+        sys.stdout.write("\n".join(lines) + "\n")
+    except Exception as e:
+        logger.error(f"Error printing similarity matrix: {e}")
 
 # Return AgglomerativeClustering with initialize
-def agglomerative_clustering():
+def agglomerative_clustering(distance_threshold: float = CLUSTERING_DISTANCE_THRESHOLD):
     agglo_clustering = AgglomerativeClustering(
         n_clusters=None,  # Automatically determine the number of clusters
-        distance_threshold=0.7,  # Set similarity threshold (1 - threshold = distance)
+        distance_threshold=distance_threshold,  # Set similarity threshold (1 - threshold = distance)
         metric="precomputed",  # Using a pre-calculated similarity matrix
-        linkage="complete"  # Calculate the distances between clusters: complete Linkage
+        linkage=CLUSTERING_LINKAGE  # Calculate the distances between clusters: see LINKAGE_METHODS
     )
     return agglo_clustering
 
+# Linkage tree (dendrogram), computed once and cut many times
+def data_fingerprint(vectors: Any) -> str:
+    """
+    Fingerprint student vectors so a saved tree can be matched to its data.
+    
+    Args:
+        vectors: Student vectors, one row per student
+    
+    Returns:
+        Hex digest of the vector shape and values
+    """
+    array = np.ascontiguousarray(vectors, dtype=np.float64)
+    digest = hashlib.sha256(str(array.shape).encode())
+    digest.update(array.tobytes())
+    return digest.hexdigest()
+
+def compute_linkage_tree(distance_matrix: np.ndarray, method: str = CLUSTERING_LINKAGE) -> np.ndarray:
+    """
+    Compute the full agglomerative merge tree from a distance matrix.
+    
+    Args:
+        distance_matrix: Square distance matrix (1 - cosine similarity)
+        method: Linkage method, one of LINKAGE_METHODS (same meaning as in
+            AgglomerativeClustering; ward, centroid and median need
+            Euclidean distances and are not valid on cosine distances)
+    
+    Returns:
+        SciPy linkage matrix of shape (N - 1, 4): merged clusters, merge
+        distance and size of the new cluster
+    
+    Raises:
+        ClusteringError: If the tree cannot be computed
+    """
+    if method not in LINKAGE_METHODS:
+        raise ClusteringError(f"Invalid linkage method: {method}. Must be one of {list(LINKAGE_METHODS)}")
+    try:
+        distances = np.clip(np.asarray(distance_matrix, dtype=np.float64), 0.0, None)
+        np.fill_diagonal(distances, 0.0)
+        tree = linkage(squareform(distances, checks=False), method=method)
+        logger.info(f"Successfully computed {method} linkage tree for {distances.shape[0]} students")
+        return tree
+    except Exception as e:
+        logger.error(f"Error computing linkage tree: {e}")
+        raise ClusteringError(f"Failed to compute linkage tree: {e}")
+
+def save_linkage_tree(tree: np.ndarray, fingerprint: str, method: str = CLUSTERING_LINKAGE,
+                      filename: str = LINKAGE_TREE_FILE) -> None:
+    """
+    Save a linkage tree together with the data it was computed from.
+    
+    Args:
+        tree: Linkage matrix from compute_linkage_tree
+        fingerprint: data_fingerprint of the student vectors
+        method: Linkage method the tree was computed with
+        filename: Path of the .npz file
+    """
+    np.savez(filename, tree=tree, fingerprint=fingerprint, method=method)
+    logger.info(f"Linkage tree saved to {filename}")
+
+def load_linkage_tree(fingerprint: Optional[str] = None, method: str = CLUSTERING_LINKAGE,
+                      filename: str = LINKAGE_TREE_FILE) -> np.ndarray:
+    """
+    Load a linkage tree saved with save_linkage_tree.
+    
+    Args:
+        fingerprint: Expected data_fingerprint of the student vectors, None to skip the check
+        method: Expected linkage method
+        filename: Path of the .npz file
+    
+    Returns:
+        Linkage matrix
+    
+    Raises:
+        ClusteringError: If the saved tree belongs to other data or another method
+    """
+    with np.load(filename) as saved:
+        tree, saved_fingerprint, saved_method = saved["tree"], str(saved["fingerprint"]), str(saved["method"])
+    if saved_method != method:
+        raise ClusteringError(f"Saved linkage tree uses {saved_method} linkage, expected {method}")
+    if fingerprint is not None and saved_fingerprint != fingerprint:
+        raise ClusteringError(f"Saved linkage tree in {filename} was computed from different student data")
+    logger.info(f"Linkage tree loaded from {filename}")
+    return tree
+
+def cut_tree_at_threshold(tree: np.ndarray, distance_threshold: float = CLUSTERING_DISTANCE_THRESHOLD) -> np.ndarray:
+    """
+    Cut the linkage tree so that no group merges at or above the threshold.
+    
+    This gives the same groups as agglomerative_clustering(distance_threshold)
+    without refitting.
+    
+    Args:
+        tree: Linkage matrix from compute_linkage_tree
+        distance_threshold: Distance at which merging stops
+    
+    Returns:
+        Zero-based cluster labels, one per student
+    """
+    # AgglomerativeClustering keeps merges strictly below the threshold,
+    # fcluster keeps merges at or below it
+    threshold = np.nextafter(distance_threshold, -np.inf)
+    return fcluster(tree, t=threshold, criterion="distance") - 1
+
+def cut_tree_into_clusters(tree: np.ndarray, n_clusters: int) -> np.ndarray:
+    """
+    Cut the linkage tree into (at most) a fixed number of groups.
+    
+    Args:
+        tree: Linkage matrix from compute_linkage_tree
+        n_clusters: Number of groups
+    
+    Returns:
+        Zero-based cluster labels, one per student
+    
+    Raises:
+        ClusteringError: If n_clusters is smaller than 1
+    """
+    if n_clusters < 1:
+        raise ClusteringError(f"Number of clusters must be at least 1, got {n_clusters}")
+    return fcluster(tree, t=n_clusters, criterion="maxclust") - 1
+
+def threshold_sweep(tree: np.ndarray, thresholds: Optional[List[float]] = None) -> List[Dict[str, Any]]:
+    """
+    Report group count and group sizes for many distance thresholds.
+    
+    Args:
+        tree: Linkage matrix from compute_linkage_tree
+        thresholds: Distance thresholds to evaluate, default 0.1 to 1.0
+    
+    Returns:
+        One dictionary per threshold with the number of groups and their
+        sizes (largest first)
+    """
+    if thresholds is None:
+        thresholds = CLUSTERING_SWEEP_THRESHOLDS
+    sweep = []
+    for threshold in thresholds:
+        labels = cut_tree_at_threshold(tree, threshold)
+        sizes = np.sort(np.bincount(labels))[::-1]
+        sweep.append({
+            "threshold": float(threshold),
+            "n_groups": len(sizes),
+            "sizes": sizes.tolist(),
+            "largest": int(sizes[0]) if len(sizes) else 0,
+            "smallest": int(sizes[-1]) if len(sizes) else 0
+        })
+    return sweep
+
+def print_threshold_sweep(sweep: List[Dict[str, Any]]) -> None:
+    """
+    Print a threshold sweep as a table.
+    
+    Args:
+        sweep: Result of threshold_sweep
+    """
+    lines = ["", "Threshold Sweep:", f"{'threshold':>10} {'groups':>8} {'largest':>8} {'smallest':>8}"]
+    for row in sweep:
+        lines.append(f"{row['threshold']:>10.2f} {row['n_groups']:>8} {row['largest']:>8} {row['smallest']:>8}")
+    sys.stdout.write("\n".join(lines) + "\n")
+
 # Grouping result print
 def print_clusters(students, labels):
     print("\nCluster Results:")
@@ -116,20 +272,47 @@ def mds_scaling(matrix):
     coordinates = mds.fit_transform(matrix)
     return coordinates
 
+def _positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
 if __name__ == "__main__":
-    students = load_from_json("students_data.json")
+    parser = argparse.ArgumentParser(description="Group students by agglomerative clustering")
+    cut = parser.add_mutually_exclusive_group()
+    cut.add_argument("--threshold", type=float, default=CLUSTERING_DISTANCE_THRESHOLD,
+                     help="Distance threshold at which to cut the tree")
+    cut.add_argument("--n-clusters", type=_positive_int, help="Cut the tree into this many groups instead")
+    parser.add_argument("--recompute", action="store_true", help="Ignore the saved linkage tree")
+    args = parser.parse_args()
 
-    # Student vector extraction / Calculate the Similarity Matrix
-    student_vectors = [student["vector"] for student in students]
-    similarity_matrix = calculate_similarity_matrix(student_vectors)
+    # Student profiles, encoded with the profile schema
+    students, student_vectors = load_student_vectors()
+    fingerprint = data_fingerprint(student_vectors)
 
+    # Calculate the Similarity Matrix
+    similarity_matrix = calculate_similarity_matrix(student_vectors)
     print_similarity_matrix(students, similarity_matrix)
 
-    # Converting to distance matrix
-    distance_matrix = 1 - similarity_matrix
+    # Reuse the saved merge tree if it was built from the same data
+    tree = None
+    if not args.recompute and os.path.exists(LINKAGE_TREE_FILE):
+        try:
+            tree = load_linkage_tree(fingerprint)
+        except ClusteringError as e:
+            logger.warning(f"{e}; recomputing")
+
+    if tree is None:
+        # Converting to distance matrix, build the merge tree once
+        distance_matrix = 1 - similarity_matrix
+        tree = compute_linkage_tree(distance_matrix)
+        save_linkage_tree(tree, fingerprint)
 
-    # Receives Agglomeration clustering with values set / clustering
-    clustering = agglomerative_clustering()
-    labels = clustering.fit_predict(distance_matrix)
+    if args.n_clusters is not None:
+        labels = cut_tree_into_clusters(tree, args.n_clusters)
+    else:
+        labels = cut_tree_at_threshold(tree, args.threshold)
 
     print_clusters(students, labels)
+    print_threshold_sweep(threshold_sweep(tree))
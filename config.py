@@ -9,16 +9,37 @@ FOREIGN_LANGUAGES = ["English", "Spanish", "Chinese", "Japanese"]
 
 # Clustering configuration
 CLUSTERING_DISTANCE_THRESHOLD = 0.5
+CLUSTERING_LINKAGE = "complete"
+LINKAGE_METHODS = ("complete", "average", "single")  # Methods valid on cosine distances
+CLUSTERING_SWEEP_THRESHOLDS = [0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0]
 CLUSTERING_RANDOM_STATE = 42
 MAX_CLUSTERS = 5
 
+# Cluster quality configuration
+QUALITY_SILHOUETTE_SAMPLE_SIZE = 2000  # Students sampled for the silhouette estimate
+QUALITY_CONFIDENCE_Z = 1.96  # 95% confidence interval
+QUALITY_BLOCK_SIZE = 1024
+QUALITY_BOOTSTRAP_RUNS = 10
+QUALITY_BOOTSTRAP_FRACTION = 0.8  # Fraction of students reclustered per run
+QUALITY_BOOTSTRAP_MAX_SAMPLE = 5000  # Cap on students reclustered per run
+QUALITY_N_JOBS = -1  # Parallel workers for stability runs, -1 for all cores
+
 # Visualization configuration
 PLOT_FIGURE_SIZE = (10, 8)
 PLOT_FONT_SIZE = 12
 PLOT_COLOR_PALETTE = 'rainbow'
 
+# Export configuration
+EXPORT_BLOCK_SIZE = 1024  # Rows computed and written per block
+EXPORT_BUFFER_SIZE = 1 << 20  # Bytes buffered per output file
+EXPORT_PRECISION = 4
+EXPORT_EDGE_SIMILARITY_THRESHOLD = 0.8  # Minimum similarity kept in similarity edge lists
+EXPORT_EDGE_DISTANCE_THRESHOLD = 0.2  # Maximum distance kept in distance edge lists
+EXPORT_TOP_K = 5
+
 # File paths
 DATA_FILE = "students_data.json"
+LINKAGE_TREE_FILE = "linkage_tree.npz"
 
 # Input validation
 MIN_GRADE = 1
@@ -0,0 +1,320 @@
+import logging
+from typing import Any, Iterable, Iterator, Optional, Sequence, Tuple
+import numpy as np
+from sklearn.preprocessing import normalize
+from config import *
+
+# Configure logging
+logger = logging.getLogger(__name__)
+logger.setLevel(getattr(logging, LOG_LEVEL))
+
+# Create console handler if no handlers exist
+if not logger.handlers:
+    console_handler = logging.StreamHandler()
+    console_handler.setLevel(getattr(logging, LOG_LEVEL))
+    formatter = logging.Formatter(LOG_FORMAT)
+    console_handler.setFormatter(formatter)
+    logger.addHandler(console_handler)
+
+SIMILARITY = "similarity"
+DISTANCE = "distance"
+EXPORT_MODES = ("npy", "csv", "edges", "topk")
+
+# Options accepted by each export mode
+MODE_OPTIONS = {
+    "npy": (),
+    "csv": ("precision",),
+    "edges": ("threshold", "precision"),
+    "topk": ("k", "precision")
+}
+
+class ExportError(Exception):
+    """Custom exception for export-related errors"""
+    pass
+
+# (first row index, block of rows, metric of the values)
+Block = Tuple[int, np.ndarray, str]
+
+def _check_metric(metric: str) -> None:
+    if metric not in (SIMILARITY, DISTANCE):
+        raise ExportError(f"Unknown metric: {metric}. Must be one of {[SIMILARITY, DISTANCE]}")
+
+def similarity_blocks(vectors: Any, metric: str = SIMILARITY, block_size: int = EXPORT_BLOCK_SIZE) -> Iterator[Block]:
+    """
+    Compute the cosine similarity (or distance) matrix one row block at a time.
+
+    Only a (block_size, N) slice is held in memory, so the full N x N matrix
+    never has to be materialized.
+
+    Args:
+        vectors: Student vectors, one row per student
+        metric: SIMILARITY or DISTANCE (1 - similarity)
+        block_size: Number of rows per block
+
+    Yields:
+        Tuples of (first row index, block of rows, metric)
+    """
+    _check_metric(metric)
+    vectors = np.asarray(vectors, dtype=np.float64)
+    if vectors.ndim != 2 or vectors.shape[0] == 0:
+        raise ExportError("No student vectors to export")
+    unit = normalize(vectors)
+    for start in range(0, unit.shape[0], block_size):
+        block = unit[start:start + block_size] @ unit.T
+        if metric == DISTANCE:
+            np.subtract(1.0, block, out=block)
+        yield start, block, metric
+
+def matrix_blocks(matrix: np.ndarray, metric: str = SIMILARITY, block_size: int = EXPORT_BLOCK_SIZE) -> Iterator[Block]:
+    """
+    Split an already computed matrix into row blocks.
+
+    Args:
+        matrix: Square similarity or distance matrix
+        metric: SIMILARITY or DISTANCE, what the matrix holds
+        block_size: Number of rows per block
+
+    Yields:
+        Tuples of (first row index, block of rows, metric)
+    """
+    _check_metric(metric)
+    for start in range(0, matrix.shape[0], block_size):
+        yield start, matrix[start:start + block_size], metric
+
+def export_npy(blocks: Iterable[Block], filename: str) -> None:
+    """
+    Stream row blocks into a .npy file backed by a memory map.
+
+    Values are stored as float32, halving the file size of the float64
+    blocks; similarity scores do not need more precision.
+
+    Args:
+        blocks: Row blocks of a square matrix
+        filename: Path of the .npy file to write
+
+    Raises:
+        ExportError: If there are no blocks to write
+    """
+    output = None
+    for start, block, _ in blocks:
+        if output is None:
+            n = block.shape[1]
+            output = np.lib.format.open_memmap(filename, mode="w+", dtype=np.float32, shape=(n, n))
+        output[start:start + block.shape[0]] = block
+    if output is None:
+        raise ExportError("No rows to export")
+    output.flush()
+    del output
+
+def export_csv(blocks: Iterable[Block], filename: str, names: Optional[Sequence[str]] = None, precision: int = EXPORT_PRECISION) -> None:
+    """
+    Stream row blocks into a buffered CSV file.
+
+    Rows are formatted and written one at a time, so memory stays bounded
+    by the float block rather than a text or Python copy of it.
+
+    Args:
+        blocks: Row blocks of a square matrix
+        filename: Path of the CSV file to write
+        names: Optional student names used as header row and first column
+        precision: Number of decimals per value
+    """
+    with open(filename, "w", newline="", buffering=EXPORT_BUFFER_SIZE) as f:
+        row_format = None
+        for start, block, _ in blocks:
+            if row_format is None:
+                row_format = ",".join([f"%.{precision}f"] * block.shape[1])
+                if names is not None:
+                    f.write(",".join([""] + [_csv_field(name) for name in names]) + "\n")
+            for i, row in enumerate(block):
+                if names is not None:
+                    f.write(_csv_field(names[start + i]) + ",")
+                f.write(row_format % tuple(row.tolist()) + "\n")
+
+def _csv_field(value: str) -> str:
+    if any(c in value for c in ',"\n'):
+        return '"' + value.replace('"', '""') + '"'
+    return value
+
+def _is_match(block: np.ndarray, threshold: float, metric: str) -> np.ndarray:
+    return block <= threshold if metric == DISTANCE else block >= threshold
+
+def export_edges(blocks: Iterable[Block], filename: str, threshold: Optional[float] = None,
+                 precision: int = EXPORT_PRECISION) -> int:
+    """
+    Write a thresholded sparse edge list (i, j, score) of the upper triangle.
+
+    For similarity blocks an edge is kept when score >= threshold, for
+    distance blocks when score <= threshold.
+
+    Args:
+        blocks: Row blocks of a square matrix
+        filename: Path of the CSV file to write
+        threshold: Score cut-off for an edge, default EXPORT_EDGE_SIMILARITY_THRESHOLD
+            or EXPORT_EDGE_DISTANCE_THRESHOLD depending on the blocks' metric
+        precision: Number of decimals per score
+
+    Returns:
+        Number of edges written
+    """
+    n_edges = 0
+    with open(filename, "w", newline="", buffering=EXPORT_BUFFER_SIZE) as f:
+        for start, block, metric in blocks:
+            if start == 0:
+                f.write(f"i,j,{metric}\n")
+                if threshold is None:
+                    threshold = EXPORT_EDGE_DISTANCE_THRESHOLD if metric == DISTANCE else EXPORT_EDGE_SIMILARITY_THRESHOLD
+            rows, cols = np.nonzero(_is_match(block, threshold, metric))
+            rows += start
+            upper = cols > rows
+            rows, cols = rows[upper], cols[upper]
+            scores = block[rows - start, cols]
+            if len(rows):
+                f.write("\n".join(f"{i},{j},{score:.{precision}f}" for i, j, score in zip(rows.tolist(), cols.tolist(), scores.tolist())) + "\n")
+            n_edges += len(rows)
+    return n_edges
+
+def top_k(blocks: Iterable[Block], k: int = EXPORT_TOP_K) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Find the k closest other students for every student.
+
+    Closest means largest score for similarity blocks and smallest score
+    for distance blocks.
+
+    Args:
+        blocks: Row blocks of a square matrix
+        k: Number of neighbours per student
+
+    Returns:
+        A tuple of (neighbour indices, scores), both of shape (N, k), best first
+    """
+    indices, scores, _ = _top_k(blocks, k)
+    return indices, scores
+
+def _top_k(blocks: Iterable[Block], k: int) -> Tuple[np.ndarray, np.ndarray, str]:
+    """top_k that also returns the metric of the blocks."""
+    if k < 1:
+        raise ExportError(f"k must be at least 1, got {k}")
+    indices, scores, metric = [], [], SIMILARITY
+    for start, block, metric in blocks:
+        n_rows, n = block.shape
+        kk = min(k, n - 1)
+        # Rank by "higher is better" and push the student itself to the end
+        ranked = -block if metric == DISTANCE else block.copy()
+        ranked[np.arange(n_rows), np.arange(start, start + n_rows)] = -np.inf
+        if kk <= 0:
+            indices.append(np.empty((n_rows, 0), dtype=np.intp))
+            scores.append(np.empty((n_rows, 0), dtype=block.dtype))
+            continue
+        candidates = np.argpartition(-ranked, kk - 1, axis=1)[:, :kk]
+        order = np.argsort(-np.take_along_axis(ranked, candidates, axis=1), axis=1)
+        best = np.take_along_axis(candidates, order, axis=1)
+        indices.append(best)
+        scores.append(np.take_along_axis(block, best, axis=1))
+    if not indices:
+        return np.empty((0, 0), dtype=np.intp), np.empty((0, 0)), metric
+    return np.vstack(indices), np.vstack(scores), metric
+
+def export_top_k(blocks: Iterable[Block], filename: str, names: Optional[Sequence[str]] = None, k: int = EXPORT_TOP_K,
+                 precision: int = EXPORT_PRECISION) -> None:
+    """
+    Write a top-k-per-student report as CSV rows of (student, rank, neighbour, score).
+
+    Args:
+        blocks: Row blocks of a square matrix
+        filename: Path of the CSV file to write
+        names: Optional student names; row indices are used otherwise
+        k: Number of neighbours per student
+        precision: Number of decimals per score
+    """
+    indices, scores, metric = _top_k(blocks, k)
+    label = (lambda i: _csv_field(names[i])) if names is not None else str
+    with open(filename, "w", newline="", buffering=EXPORT_BUFFER_SIZE) as f:
+        f.write(f"student,rank,neighbor,{metric}\n")
+        for i, (row_indices, row_scores) in enumerate(zip(indices.tolist(), scores.tolist())):
+            student = label(i)
+            f.write("".join(f"{student},{rank},{label(j)},{score:.{precision}f}\n"
+                            for rank, (j, score) in enumerate(zip(row_indices, row_scores), start=1)))
+
+def export_similarity(vectors: Any, filename: str, mode: str = "npy", metric: str = SIMILARITY,
+                      names: Optional[Sequence[str]] = None, block_size: int = EXPORT_BLOCK_SIZE, **options: Any) -> None:
+    """
+    Compute and export the similarity or distance matrix in row blocks.
+
+    Args:
+        vectors: Student vectors, one row per student
+        filename: Output path
+        mode: One of "npy", "csv", "edges" or "topk"
+        metric: SIMILARITY or DISTANCE
+        names: Optional student names (csv and topk modes)
+        block_size: Number of rows computed and written at a time
+        **options: Extra arguments for the selected exporter, see MODE_OPTIONS
+            (threshold for edges, k for topk, precision for all text modes)
+
+    Raises:
+        ExportError: If the mode is unknown, an option does not apply to
+            the mode, or the export fails
+    """
+    if mode not in EXPORT_MODES:
+        raise ExportError(f"Unknown export mode: {mode}. Must be one of {list(EXPORT_MODES)}")
+    unsupported = sorted(set(options) - set(MODE_OPTIONS[mode]))
+    if unsupported:
+        raise ExportError(f"Options {unsupported} do not apply to {mode} export. Allowed: {list(MODE_OPTIONS[mode])}")
+    try:
+        blocks = similarity_blocks(vectors, metric, block_size)
+        if mode == "npy":
+            export_npy(blocks, filename)
+        elif mode == "csv":
+            export_csv(blocks, filename, names, **options)
+        elif mode == "edges":
+            n_edges = export_edges(blocks, filename, **options)
+            logger.info(f"Wrote {n_edges} edges")
+        else:
+            export_top_k(blocks, filename, names, **options)
+        logger.info(f"Successfully exported {metric} matrix ({mode}) to {filename}")
+    except ExportError:
+        raise
+    except Exception as e:
+        logger.error(f"Error exporting {metric} matrix to {filename}: {e}")
+        raise ExportError(f"Failed to export {metric} matrix: {e}")
+
+if __name__ == "__main__":
+    import argparse
+    from vector import load_student_vectors
+
+    parser = argparse.ArgumentParser(description="Export student similarity results")
+    parser.add_argument("output", help="Output file path")
+    parser.add_argument("--mode", choices=EXPORT_MODES, default="npy")
+    parser.add_argument("--metric", choices=(SIMILARITY, DISTANCE), default=SIMILARITY)
+    parser.add_argument("--threshold", type=float, default=None,
+                        help="Edge cut-off, default depends on --metric")
+    parser.add_argument("-k", type=int, default=None,
+                        help=f"Neighbours per student in topk mode, default {EXPORT_TOP_K}")
+    args = parser.parse_args()
+    if args.threshold is not None and args.mode != "edges":
+        parser.error("--threshold only applies to --mode edges")
+    if args.k is not None and args.mode != "topk":
+        parser.error("-k only applies to --mode topk")
+
+    try:
+        students, vectors = load_student_vectors()
+        if not students:
+            print("No student data found. Please add some students first.")
+            exit(1)
+
+        options = {}
+        if args.threshold is not None:
+            options["threshold"] = args.threshold
+        if args.k is not None:
+            options["k"] = args.k
+        export_similarity(
+            vectors,
+            args.output,
+            mode=args.mode,
+            metric=args.metric,
+            names=[student["name"] for student in students],
+            **options
+        )
+    except Exception as e:
+        logger.error(f"Unexpected error: {e}")
+        print(f"\nAn unexpected error occurred: {e}")
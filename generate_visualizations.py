@@ -1,19 +1,18 @@
-from vector import load_from_json
+from vector import load_student_vectors
 from show_matrix import show_distance_matrix
 from show_clustering import show_clustering
-from algorithm import calculate_similarity_matrix, mds_scaling, agglomerative_clustering
+from algorithm import calculate_similarity_matrix, mds_scaling, compute_linkage_tree, cut_tree_at_threshold
 
 
 def generate_visualizations():
     # Load student data
-    students = load_from_json()
+    students, vectors = load_student_vectors()
     if not students:
         print("No student data found. Please add some students first.")
         return
 
-    # Extract names and vectors
+    # Extract names
     names = [student["name"] for student in students]
-    vectors = [student["vector"] for student in students]
 
     # Calculate similarity matrix
     similarity_matrix = calculate_similarity_matrix(vectors)
@@ -22,8 +21,8 @@ def generate_visualizations():
     # MDS for 2D coordinates
     coordinates = mds_scaling(distance_matrix)
     # Clustering
-    clustering = agglomerative_clustering()
-    labels = clustering.fit_predict(distance_matrix)
+    tree = compute_linkage_tree(distance_matrix)
+    labels = cut_tree_at_threshold(tree)
 
     # Visualize similarity matrix
     show_distance_matrix(names, coordinates, save_plot=True)
@@ -0,0 +1,377 @@
+import logging
+import sys
+import time
+from typing import List, Dict, Any, Optional, Tuple
+import numpy as np
+from joblib import Parallel, delayed
+from scipy import sparse
+from sklearn.metrics import adjusted_rand_score
+from sklearn.preprocessing import normalize
+from algorithm import (ClusteringError, calculate_similarity_matrix, compute_linkage_tree, cut_tree_at_threshold,
+                       data_fingerprint, load_linkage_tree, save_linkage_tree)
+from config import *
+
+# Configure logging
+logger = logging.getLogger(__name__)
+logger.setLevel(getattr(logging, LOG_LEVEL))
+
+# Create console handler if no handlers exist
+if not logger.handlers:
+    console_handler = logging.StreamHandler()
+    console_handler.setLevel(getattr(logging, LOG_LEVEL))
+    formatter = logging.Formatter(LOG_FORMAT)
+    console_handler.setFormatter(formatter)
+    logger.addHandler(console_handler)
+
+# Bounds of the adjusted Rand index (sklearn documents -0.5 as the lower bound)
+ARI_MIN = -0.5
+ARI_MAX = 1.0
+
+def _prepare(vectors: Any, labels: Any) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Return unit vectors, zero-based labels and group sizes."""
+    unit = normalize(np.asarray(vectors, dtype=np.float64))
+    labels = np.asarray(labels)
+    if labels.shape[0] != unit.shape[0]:
+        raise ClusteringError(f"Got {labels.shape[0]} labels for {unit.shape[0]} students")
+    _, labels = np.unique(labels, return_inverse=True)
+    return unit, labels, np.bincount(labels)
+
+def _membership(labels: np.ndarray, n_groups: int) -> sparse.csr_matrix:
+    """Sparse (N, G) one-hot group membership matrix."""
+    n = labels.shape[0]
+    return sparse.csr_matrix((np.ones(n), (np.arange(n), labels)), shape=(n, n_groups))
+
+def group_statistics(vectors: Any, labels: Any, block_size: int = QUALITY_BLOCK_SIZE) -> List[Dict[str, Any]]:
+    """
+    Compute per-group cohesion and separation from group centroids.
+
+    Cohesion is the mean cosine distance of the members to their group
+    centroid, separation the cosine distance from the centroid to the
+    nearest other centroid. Cost is O(N * d + G^2 * d), no pairwise pass;
+    the nearest centroid is searched in row blocks, so memory stays at
+    O(block_size * G).
+
+    Args:
+        vectors: Student vectors, one row per student
+        labels: Cluster label for each student
+        block_size: Number of centroids compared at a time
+
+    Returns:
+        One dictionary per group with its size, cohesion and separation
+    """
+    unit, labels, sizes = _prepare(vectors, labels)
+    n_groups = len(sizes)
+    sums = np.asarray(_membership(labels, n_groups).T @ unit)
+    centroids = normalize(sums)
+
+    # Distance of every student to its own centroid direction
+    member_distance = np.clip(1.0 - np.einsum("ij,ij->i", unit, centroids[labels]), 0.0, None)
+    cohesion = np.bincount(labels, weights=member_distance, minlength=n_groups) / sizes
+
+    separation = np.full(n_groups, np.nan)
+    nearest = np.full(n_groups, -1)
+    if n_groups > 1:
+        for start in range(0, n_groups, block_size):
+            stop = min(start + block_size, n_groups)
+            centroid_distance = 1.0 - centroids[start:stop] @ centroids.T
+            centroid_distance[np.arange(stop - start), np.arange(start, stop)] = np.inf
+            nearest[start:stop] = np.argmin(centroid_distance, axis=1)
+            separation[start:stop] = centroid_distance[np.arange(stop - start), nearest[start:stop]]
+
+    return [
+        {
+            "group": group,
+            "size": int(sizes[group]),
+            "cohesion": float(cohesion[group]),
+            "separation": float(separation[group]),
+            "nearest_group": int(nearest[group])
+        }
+        for group in range(n_groups)
+    ]
+
+def size_distribution(labels: Any) -> Dict[str, Any]:
+    """
+    Summarize the distribution of group sizes.
+
+    Args:
+        labels: Cluster label for each student
+
+    Returns:
+        A dictionary with the group count and size statistics
+    """
+    _, sizes = np.unique(np.asarray(labels), return_counts=True)
+    if not len(sizes):
+        return {"n_groups": 0, "min": 0, "max": 0, "mean": 0.0, "median": 0.0, "singletons": 0}
+    return {
+        "n_groups": int(len(sizes)),
+        "min": int(sizes.min()),
+        "max": int(sizes.max()),
+        "mean": float(sizes.mean()),
+        "median": float(np.median(sizes)),
+        "singletons": int(np.count_nonzero(sizes == 1))
+    }
+
+def silhouette_estimate(vectors: Any, labels: Any, sample_size: Optional[int] = QUALITY_SILHOUETTE_SAMPLE_SIZE,
+                        block_size: int = QUALITY_BLOCK_SIZE, random_state: int = CLUSTERING_RANDOM_STATE) -> Dict[str, Any]:
+    """
+    Estimate the mean cosine silhouette from a random sample of students.
+
+    With cosine distance the summed distance from a student to a group is
+    size - u . S, where S is the sum of the group's unit vectors, so each
+    sampled student costs O(G * d) instead of O(N * d). Samples are
+    processed in blocks of rows.
+
+    Args:
+        vectors: Student vectors, one row per student
+        labels: Cluster label for each student
+        sample_size: Number of sampled students (at least 2), None for all of them
+        block_size: Number of sampled students per block
+        random_state: Seed for sampling
+
+    Returns:
+        A dictionary with the mean silhouette, its standard error and a
+        confidence interval (exact when every student is used)
+
+    Raises:
+        ClusteringError: If the group count or sample size is out of range
+    """
+    if sample_size is not None and sample_size < 2:
+        raise ClusteringError(f"Silhouette sample size must be at least 2, got {sample_size}")
+    unit, labels, sizes = _prepare(vectors, labels)
+    n, n_groups = unit.shape[0], len(sizes)
+    if n_groups < 2 or n_groups >= n:
+        raise ClusteringError(f"Silhouette needs 2 to {n - 1} groups, got {n_groups}")
+
+    if sample_size is None or sample_size >= n:
+        sample = np.arange(n)
+    else:
+        sample = np.random.default_rng(random_state).choice(n, size=sample_size, replace=False)
+    sums = np.asarray(_membership(labels, n_groups).T @ unit)
+    self_similarity = np.einsum("ij,ij->i", unit, unit)
+
+    scores = np.empty(len(sample))
+    for start in range(0, len(sample), block_size):
+        rows = sample[start:start + block_size]
+        own = labels[rows]
+        # Mean distance to every group, then correct the own group for the student itself
+        total = sizes - unit[rows] @ sums.T
+        own_total = total[np.arange(len(rows)), own] - (1.0 - self_similarity[rows])
+        own_size = sizes[own]
+        a = np.divide(own_total, own_size - 1, out=np.zeros(len(rows)), where=own_size > 1)
+        mean_distance = total / sizes
+        mean_distance[np.arange(len(rows)), own] = np.inf
+        b = mean_distance.min(axis=1)
+        denominator = np.maximum(a, b)
+        s = np.divide(b - a, denominator, out=np.zeros(len(rows)), where=denominator > 0)
+        s[own_size == 1] = 0.0  # singleton groups score 0, as in sklearn
+        scores[start:start + len(rows)] = s
+
+    mean = float(scores.mean())
+    exact = len(sample) == n
+    std_error = 0.0 if exact else float(scores.std(ddof=1) / np.sqrt(len(sample)))
+    margin = QUALITY_CONFIDENCE_Z * std_error
+    return {
+        "mean": mean,
+        "std_error": std_error,
+        "ci_low": mean - margin,
+        "ci_high": mean + margin,
+        "sample_size": int(len(sample)),
+        "exact": exact
+    }
+
+def _stability_run(unit: np.ndarray, labels: np.ndarray, sample_size: int, distance_threshold: float,
+                   method: str, seed: int) -> float:
+    """Recluster one random subsample and compare it with the reference labels."""
+    rows = np.random.default_rng(seed).choice(unit.shape[0], size=sample_size, replace=False)
+    distance_matrix = 1 - calculate_similarity_matrix(unit[rows])
+    sub_labels = cut_tree_at_threshold(compute_linkage_tree(distance_matrix, method), distance_threshold)
+    return float(adjusted_rand_score(labels[rows], sub_labels))
+
+def bootstrap_stability(vectors: Any, labels: Any, distance_threshold: float = CLUSTERING_DISTANCE_THRESHOLD,
+                        n_runs: int = QUALITY_BOOTSTRAP_RUNS, fraction: float = QUALITY_BOOTSTRAP_FRACTION,
+                        max_sample_size: int = QUALITY_BOOTSTRAP_MAX_SAMPLE, n_jobs: int = QUALITY_N_JOBS,
+                        random_state: int = CLUSTERING_RANDOM_STATE, method: str = CLUSTERING_LINKAGE) -> Dict[str, Any]:
+    """
+    Measure how stable the groups are under resampling.
+
+    Each run reclusters a random subsample (without replacement, so no
+    duplicate students at distance 0) with the same threshold and scores
+    the agreement with the reference labels by adjusted Rand index. Runs
+    are executed in parallel and the subsample size is capped so large
+    cohorts stay affordable.
+
+    Args:
+        vectors: Student vectors, one row per student
+        labels: Reference cluster label for each student
+        distance_threshold: Threshold used to cut each run's linkage tree
+        n_runs: Number of resampling runs
+        fraction: Fraction of students drawn per run
+        max_sample_size: Upper bound on students drawn per run
+        n_jobs: Number of parallel workers (-1 for all cores)
+        random_state: Seed for the runs
+        method: Linkage method used to recluster each run
+
+    Returns:
+        A dictionary with the per-run scores, their range and a normal
+        approximation confidence interval for the mean score
+
+    Raises:
+        ClusteringError: If n_runs is smaller than 1
+    """
+    if n_runs < 1:
+        raise ClusteringError(f"Stability needs at least 1 run, got {n_runs}")
+    unit, labels, _ = _prepare(vectors, labels)
+    sample_size = min(max(2, int(unit.shape[0] * fraction)), max_sample_size, unit.shape[0])
+    seeds = np.random.SeedSequence(random_state).generate_state(n_runs)
+    scores = Parallel(n_jobs=n_jobs)(
+        delayed(_stability_run)(unit, labels, sample_size, distance_threshold, method, int(seed)) for seed in seeds
+    )
+    scores = np.asarray(scores)
+    mean = float(scores.mean())
+    std = float(scores.std(ddof=1)) if n_runs > 1 else 0.0
+    margin = QUALITY_CONFIDENCE_Z * std / np.sqrt(n_runs)
+    return {
+        "scores": scores.tolist(),
+        "mean": mean,
+        "std": std,
+        "min": float(scores.min()),
+        "max": float(scores.max()),
+        # Clipped to the range of the adjusted Rand index
+        "ci_low": float(max(mean - margin, ARI_MIN)),
+        "ci_high": float(min(mean + margin, ARI_MAX)),
+        "n_runs": int(n_runs),
+        "sample_size": int(sample_size)
+    }
+
+def quality_report(vectors: Any, labels: Any, stability: bool = False,
+                   distance_threshold: float = CLUSTERING_DISTANCE_THRESHOLD,
+                   stability_options: Optional[Dict[str, Any]] = None, **options: Any) -> Dict[str, Any]:
+    """
+    Build a cluster quality report without an extra quadratic pass.
+
+    Args:
+        vectors: Student vectors, one row per student
+        labels: Cluster label for each student
+        stability: Whether to include bootstrap stability runs
+        distance_threshold: Threshold the labels were produced with (stability only)
+        stability_options: Extra arguments for bootstrap_stability (n_runs,
+            fraction, max_sample_size, n_jobs, random_state, method)
+        **options: Extra arguments for silhouette_estimate (sample_size, random_state)
+
+    Returns:
+        A dictionary with group statistics, size distribution, silhouette
+        estimate and, if requested, stability
+    """
+    try:
+        report = {
+            "groups": group_statistics(vectors, labels),
+            "sizes": size_distribution(labels),
+            "silhouette": None
+        }
+        if 1 < report["sizes"]["n_groups"] < len(labels):
+            report["silhouette"] = silhouette_estimate(vectors, labels, **options)
+        if stability:
+            report["stability"] = bootstrap_stability(vectors, labels, distance_threshold, **(stability_options or {}))
+        logger.info("Successfully built cluster quality report")
+        return report
+    except ClusteringError:
+        raise
+    except Exception as e:
+        logger.error(f"Error building quality report: {e}")
+        raise ClusteringError(f"Failed to build quality report: {e}")
+
+def compare_configurations(vectors: Any, methods: Optional[List[str]] = None, thresholds: Optional[List[float]] = None,
+                           sample_size: Optional[int] = QUALITY_SILHOUETTE_SAMPLE_SIZE) -> List[Dict[str, Any]]:
+    """
+    Compare speed and quality of clustering configurations.
+
+    The distance matrix is computed once and one linkage tree is built per
+    method; each threshold then only costs a cut and a sampled silhouette
+    estimate.
+
+    Args:
+        vectors: Student vectors, one row per student
+        methods: Linkage methods to compare, default all LINKAGE_METHODS
+        thresholds: Distance thresholds to compare, default from config
+        sample_size: Sample size for the silhouette estimates
+
+    Returns:
+        One dictionary per method with its tree build time and one result
+        (group count, silhouette, cut time) per threshold
+    """
+    if methods is None:
+        methods = LINKAGE_METHODS
+    if thresholds is None:
+        thresholds = CLUSTERING_SWEEP_THRESHOLDS
+    distance_matrix = 1 - calculate_similarity_matrix(vectors)
+
+    comparison = []
+    for method in methods:
+        start = time.perf_counter()
+        tree = compute_linkage_tree(distance_matrix, method)
+        tree_seconds = time.perf_counter() - start
+
+        results = []
+        for threshold in thresholds:
+            start = time.perf_counter()
+            labels = cut_tree_at_threshold(tree, threshold)
+            cut_seconds = time.perf_counter() - start
+            sizes = size_distribution(labels)
+            silhouette = None
+            if 1 < sizes["n_groups"] < len(labels):
+                silhouette = silhouette_estimate(vectors, labels, sample_size)["mean"]
+            results.append({
+                "threshold": float(threshold),
+                "n_groups": sizes["n_groups"],
+                "largest": sizes["max"],
+                "silhouette": silhouette,
+                "cut_seconds": cut_seconds
+            })
+        comparison.append({"method": method, "tree_seconds": tree_seconds, "results": results})
+    return comparison
+
+def print_quality_report(report: Dict[str, Any]) -> None:
+    """
+    Print a quality report as tables.
+
+    Args:
+        report: Result of quality_report
+    """
+    sizes = report["sizes"]
+    lines = ["", "Cluster Quality:"]
+    lines.append(f"Groups: {sizes['n_groups']}  sizes min/median/max: {sizes['min']}/{sizes['median']:g}/{sizes['max']}  singletons: {sizes['singletons']}")
+    silhouette = report["silhouette"]
+    if silhouette is not None:
+        kind = "exact" if silhouette["exact"] else f"n={silhouette['sample_size']}"
+        lines.append(f"Silhouette: {silhouette['mean']:.3f} [{silhouette['ci_low']:.3f}, {silhouette['ci_high']:.3f}] ({kind})")
+    if "stability" in report:
+        stability = report["stability"]
+        lines.append(f"Stability (ARI): {stability['mean']:.3f} [{stability['ci_low']:.3f}, {stability['ci_high']:.3f}] "
+                     f"(runs={stability['n_runs']}, range {stability['min']:.3f}-{stability['max']:.3f}, n={stability['sample_size']})")
+    lines.append(f"{'group':>6} {'size':>6} {'cohesion':>9} {'separation':>11}")
+    for group in report["groups"]:
+        lines.append(f"{group['group']:>6} {group['size']:>6} {group['cohesion']:>9.3f} {group['separation']:>11.3f}")
+    sys.stdout.write("\n".join(lines) + "\n")
+
+if __name__ == "__main__":
+    from vector import load_student_vectors
+
+    try:
+        students, vectors = load_student_vectors()
+        if not students:
+            print("No student data found. Please add some students first.")
+            exit(1)
+
+        # Cut the saved merge tree; rebuild it only if it is missing or stale
+        fingerprint = data_fingerprint(vectors)
+        try:
+            tree = load_linkage_tree(fingerprint)
+        except (OSError, ClusteringError) as e:
+            logger.warning(f"Could not use saved linkage tree ({e}); recomputing")
+            tree = compute_linkage_tree(1 - calculate_similarity_matrix(vectors))
+            save_linkage_tree(tree, fingerprint)
+        labels = cut_tree_at_threshold(tree)
+        print_quality_report(quality_report(vectors, labels, stability=True))
+    except Exception as e:
+        logger.error(f"Unexpected error: {e}")
+        print(f"\nAn unexpected error occurred: {e}")
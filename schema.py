@@ -0,0 +1,348 @@
+import itertools
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Tuple, Sequence, FrozenSet
+import numpy as np
+from config import *
+
+class ValidationError(Exception):
+    """Custom exception for validation errors"""
+    pass
+
+WEEK_DAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+
+# Field kinds
+CATEGORICAL = "categorical"  # one option out of a list -> one-hot
+MULTI = "multi"              # any subset of a list -> multi-hot
+RANGE = "range"              # bounded integer -> one-hot over [min, max]
+BOOLEAN = "boolean"          # yes/no -> single 0/1 slot
+
+@dataclass(frozen=True)
+class FieldSpec:
+    """
+    Declarative description of one profile field.
+
+    Args:
+        name: Key of the field in the student dictionary
+        kind: One of CATEGORICAL, MULTI, RANGE or BOOLEAN
+        options: Ordered options for CATEGORICAL / MULTI fields
+        min_value: Lower bound for RANGE fields
+        max_value: Upper bound for RANGE fields
+        label: Human readable name used in error messages
+    """
+    name: str
+    kind: str
+    options: Tuple[str, ...] = ()
+    min_value: int = 0
+    max_value: int = 0
+    label: str = ""
+
+@dataclass(frozen=True)
+class CompiledField:
+    """
+    A FieldSpec resolved to its position in the student vector.
+
+    Args:
+        spec: The declarative field description
+        offset: Index of the first vector slot owned by the field
+        width: Number of vector slots owned by the field
+        option_set: Frozen set of valid options (CATEGORICAL / MULTI)
+        index: Mapping from option to its slot relative to offset
+    """
+    spec: FieldSpec
+    offset: int
+    width: int
+    option_set: FrozenSet[Any] = field(default_factory=frozenset)
+    index: Dict[Any, int] = field(default_factory=dict)
+
+    @property
+    def name(self) -> str:
+        return self.spec.name
+
+    @property
+    def label(self) -> str:
+        return self.spec.label or self.spec.name.replace("_", " ")
+
+    def slot_names(self) -> List[str]:
+        """Return a descriptive name for every vector slot owned by the field."""
+        if self.spec.kind == BOOLEAN:
+            return [self.name]
+        if self.spec.kind == RANGE:
+            return [f"{self.name}={value}" for value in range(self.spec.min_value, self.spec.max_value + 1)]
+        return [f"{self.name}={option}" for option in self.spec.options]
+
+# Profile schema, in vector order
+PROFILE_FIELDS: Tuple[FieldSpec, ...] = (
+    FieldSpec("major", CATEGORICAL, tuple(MAJORS)),
+    FieldSpec("grade", RANGE, min_value=MIN_GRADE, max_value=MAX_GRADE, label="Grade"),
+    FieldSpec("study_goal", CATEGORICAL, tuple(GOALS)),
+    FieldSpec("class_participation", CATEGORICAL, tuple(CLASS_PARTICIPATION_LEVELS)),
+    FieldSpec("weekly_study_hours", CATEGORICAL, tuple(WEEKLY_STUDY_HOURS)),
+    FieldSpec("current_projects", RANGE, min_value=MIN_PROJECTS, max_value=MAX_PROJECTS, label="Number of projects"),
+    FieldSpec("available_days", MULTI, tuple(WEEK_DAYS), label="available day"),
+    FieldSpec("preferred_time", CATEGORICAL, tuple(PREFERRED_TIMES)),
+    FieldSpec("exam_preparation_time", CATEGORICAL, tuple(EXAM_PREP_TIMES)),
+    FieldSpec("uses_course_materials", BOOLEAN),
+    FieldSpec("self_study_ability", BOOLEAN),
+    FieldSpec("preferred_environment", CATEGORICAL, tuple(ENVIRONMENTS)),
+    FieldSpec("preferred_study_tool", CATEGORICAL, tuple(STUDY_TOOLS)),
+    FieldSpec("study_intensity", CATEGORICAL, tuple(STUDY_INTENSITY)),
+    FieldSpec("study_mode", CATEGORICAL, tuple(STUDY_MODES)),
+    FieldSpec("programming_stack", MULTI, tuple(PROGRAMMING_STACKS)),
+    FieldSpec("research_experience", BOOLEAN),
+    FieldSpec("foreign_languages", MULTI, tuple(FOREIGN_LANGUAGES), label="foreign language"),
+    FieldSpec("online_courses", RANGE, min_value=MIN_ONLINE_COURSES, max_value=MAX_ONLINE_COURSES, label="Number of online courses"),
+    FieldSpec("leadership_experience", BOOLEAN),
+)
+
+def compile_schema(specs: Sequence[FieldSpec]) -> Tuple[Tuple[CompiledField, ...], int]:
+    """
+    Resolve field specs into frozen option sets and vector offsets.
+
+    Args:
+        specs: Field specs in vector order
+
+    Returns:
+        A tuple of (compiled fields, total vector length)
+    """
+    compiled = []
+    offset = 0
+    for spec in specs:
+        if spec.kind in (CATEGORICAL, MULTI):
+            compiled_field = CompiledField(
+                spec, offset, len(spec.options),
+                frozenset(spec.options),
+                {option: i for i, option in enumerate(spec.options)}
+            )
+        elif spec.kind == RANGE:
+            compiled_field = CompiledField(spec, offset, spec.max_value - spec.min_value + 1)
+        elif spec.kind == BOOLEAN:
+            compiled_field = CompiledField(spec, offset, 1, frozenset((True, False)))
+        else:
+            raise ValueError(f"Unknown field kind for {spec.name}: {spec.kind}")
+        compiled.append(compiled_field)
+        offset += compiled_field.width
+    return tuple(compiled), offset
+
+SCHEMA, VECTOR_LENGTH = compile_schema(PROFILE_FIELDS)
+FIELDS_BY_NAME: Dict[str, CompiledField] = {f.name: f for f in SCHEMA}
+
+def vector_layout() -> Dict[str, Tuple[int, int]]:
+    """
+    Describe the student vector layout.
+
+    Returns:
+        A dictionary mapping field name to its (offset, width) in the vector
+    """
+    return {f.name: (f.offset, f.width) for f in SCHEMA}
+
+def feature_names() -> List[str]:
+    """
+    Name every slot of the student vector.
+
+    Returns:
+        A list of VECTOR_LENGTH names such as "major=Math" or "grade=2"
+    """
+    return [name for f in SCHEMA for name in f.slot_names()]
+
+def _options_text(compiled_field: CompiledField) -> str:
+    return str(list(compiled_field.spec.options))
+
+def _is_hashable(value: Any) -> bool:
+    try:
+        hash(value)
+    except TypeError:
+        return False
+    return True
+
+def _is_integer(value: Any) -> bool:
+    return isinstance(value, (int, np.integer)) and not isinstance(value, (bool, np.bool_))
+
+def validate_value(name: str, value: Any) -> None:
+    """
+    Validate a single field value against the compiled schema.
+
+    Args:
+        name: Name of the field
+        value: The value to validate
+
+    Raises:
+        ValidationError: If the value is not valid for the field
+    """
+    compiled_field = FIELDS_BY_NAME[name]
+    spec = compiled_field.spec
+    if spec.kind == CATEGORICAL:
+        if not _is_hashable(value) or value not in compiled_field.option_set:
+            raise ValidationError(f"Invalid {compiled_field.label}: {value}. Must be one of {_options_text(compiled_field)}")
+    elif spec.kind == MULTI:
+        if isinstance(value, str) or not isinstance(value, (list, tuple, set, frozenset)):
+            raise ValidationError(f"Invalid {compiled_field.label}: {value}. Must be a list")
+        for item in value:
+            if not _is_hashable(item) or item not in compiled_field.option_set:
+                raise ValidationError(f"Invalid {compiled_field.label}: {item}. Must be one of {_options_text(compiled_field)}")
+    elif spec.kind == RANGE:
+        if not _is_integer(value):
+            raise ValidationError(f"{compiled_field.label} must be an integer")
+        if not spec.min_value <= value <= spec.max_value:
+            raise ValidationError(f"{compiled_field.label} must be between {spec.min_value} and {spec.max_value}")
+    elif not isinstance(value, (bool, np.bool_)):
+        raise ValidationError(f"Invalid {compiled_field.label}: {value}. Must be true or false")
+
+def validate_record(student: Dict[str, Any]) -> None:
+    """
+    Validate every schema field of a student profile.
+
+    Args:
+        student: Dictionary containing student attributes
+
+    Raises:
+        ValidationError: If a field is missing or invalid
+    """
+    for compiled_field in SCHEMA:
+        if compiled_field.name not in student:
+            raise ValidationError(f"Missing required field: '{compiled_field.name}'")
+        validate_value(compiled_field.name, student[compiled_field.name])
+
+def encode_record(student: Dict[str, Any], validate: bool = True) -> List[int]:
+    """
+    Transform a student profile into its vector representation.
+
+    Args:
+        student: Dictionary containing student attributes
+        validate: Whether to validate the profile first
+
+    Returns:
+        A list of VECTOR_LENGTH ints laid out as described by vector_layout()
+
+    Raises:
+        ValidationError: If validation is enabled and the profile is invalid
+    """
+    if validate:
+        validate_record(student)
+    vector = [0] * VECTOR_LENGTH
+    for compiled_field in SCHEMA:
+        spec = compiled_field.spec
+        value = student[compiled_field.name]
+        if spec.kind == CATEGORICAL:
+            if value in compiled_field.index:
+                vector[compiled_field.offset + compiled_field.index[value]] = 1
+        elif spec.kind == MULTI:
+            for item in value:
+                if item in compiled_field.index:
+                    vector[compiled_field.offset + compiled_field.index[item]] = 1
+        elif spec.kind == RANGE:
+            vector[compiled_field.offset + value - spec.min_value] = 1
+        else:
+            vector[compiled_field.offset] = 1 if value else 0
+    return vector
+
+def _invalid_rows(mask: np.ndarray, limit: int = 5) -> str:
+    rows = np.flatnonzero(mask)
+    shown = ", ".join(str(row) for row in rows[:limit])
+    more = f" and {len(rows) - limit} more" if len(rows) > limit else ""
+    return f"rows {shown}{more}"
+
+def validate_column(name: str, values: Sequence[Any]) -> None:
+    """
+    Validate a whole column of values for one field at once.
+
+    Categorical columns are checked with a single set difference against the
+    field's frozen option set, range columns with array min/max comparisons.
+
+    Args:
+        name: Name of the field
+        values: The field's value for every record
+
+    Raises:
+        ValidationError: If any value in the column is invalid
+    """
+    compiled_field = FIELDS_BY_NAME[name]
+    spec = compiled_field.spec
+    if spec.kind == CATEGORICAL:
+        try:
+            invalid = set(values) - compiled_field.option_set
+        except TypeError:
+            raise ValidationError(f"Invalid {compiled_field.label}: every value must be a single option, not a list")
+        if invalid:
+            raise ValidationError(f"Invalid {compiled_field.label}: {sorted(map(str, invalid))}. Must be one of {_options_text(compiled_field)}")
+    elif spec.kind == MULTI:
+        if any(isinstance(value, str) or not isinstance(value, (list, tuple, set, frozenset)) for value in values):
+            raise ValidationError(f"Invalid {compiled_field.label}: every value must be a list")
+        try:
+            invalid = set(itertools.chain.from_iterable(values)) - compiled_field.option_set
+        except TypeError:
+            raise ValidationError(f"Invalid {compiled_field.label}: list items must be single options, not nested lists")
+        if invalid:
+            raise ValidationError(f"Invalid {compiled_field.label}: {sorted(map(str, invalid))}. Must be one of {_options_text(compiled_field)}")
+    elif spec.kind == RANGE:
+        # Same type check as validate_value, done before conversion:
+        # np.asarray would silently turn True into 1 or fail on nested lists
+        if not all(_is_integer(value) for value in values):
+            raise ValidationError(f"{compiled_field.label} must be an integer")
+        column = np.asarray(values, dtype=np.int64)
+        out_of_range = (column < spec.min_value) | (column > spec.max_value)
+        if out_of_range.any():
+            raise ValidationError(f"{compiled_field.label} must be between {spec.min_value} and {spec.max_value} ({_invalid_rows(out_of_range)})")
+    elif not all(isinstance(value, (bool, np.bool_)) for value in values):
+        raise ValidationError(f"Invalid {compiled_field.label}: every value must be true or false")
+
+def _column(students: Sequence[Dict[str, Any]], name: str) -> List[Any]:
+    try:
+        return [student[name] for student in students]
+    except KeyError:
+        raise ValidationError(f"Missing required field: '{name}'")
+
+def validate_records(students: Sequence[Dict[str, Any]]) -> None:
+    """
+    Validate a batch of student profiles column by column.
+
+    Args:
+        students: List of student data dictionaries
+
+    Raises:
+        ValidationError: If any profile is missing a field or has an invalid value
+    """
+    for compiled_field in SCHEMA:
+        validate_column(compiled_field.name, _column(students, compiled_field.name))
+
+def encode_records(students: Sequence[Dict[str, Any]], validate: bool = True) -> np.ndarray:
+    """
+    Transform a batch of student profiles into a vector matrix.
+
+    Each field is encoded for all records at once by scattering ones into
+    the field's slice of a preallocated matrix.
+
+    Args:
+        students: List of student data dictionaries
+        validate: Whether to validate the batch first
+
+    Returns:
+        A (len(students), VECTOR_LENGTH) uint8 matrix
+
+    Raises:
+        ValidationError: If validation is enabled and any profile is invalid
+    """
+    if validate:
+        validate_records(students)
+    n_records = len(students)
+    matrix = np.zeros((n_records, VECTOR_LENGTH), dtype=np.uint8)
+    rows = np.arange(n_records)
+    for compiled_field in SCHEMA:
+        spec = compiled_field.spec
+        values = _column(students, compiled_field.name)
+        if spec.kind == CATEGORICAL:
+            index = compiled_field.index
+            slots = np.fromiter((index.get(value, -1) for value in values), dtype=np.intp, count=n_records)
+            known = slots >= 0
+            matrix[rows[known], compiled_field.offset + slots[known]] = 1
+        elif spec.kind == MULTI:
+            index = compiled_field.index
+            lengths = np.fromiter((len(value) for value in values), dtype=np.intp, count=n_records)
+            slots = np.fromiter((index.get(item, -1) for item in itertools.chain.from_iterable(values)), dtype=np.intp, count=int(lengths.sum()))
+            item_rows = np.repeat(rows, lengths)
+            known = slots >= 0
+            matrix[item_rows[known], compiled_field.offset + slots[known]] = 1
+        elif spec.kind == RANGE:
+            matrix[rows, compiled_field.offset + np.asarray(values, dtype=np.intp) - spec.min_value] = 1
+        else:
+            matrix[:, compiled_field.offset] = np.asarray(values, dtype=bool)
+    return matrix